@@ -1,10 +1,29 @@
 # Import necessary libraries
-import feedparser
+try:
+    import fastfeedparser as feedparser # lxml-backed, much faster than pure-Python feedparser
+    FASTFEEDPARSER_AVAILABLE = True
+except ImportError:
+    import feedparser
+    FASTFEEDPARSER_AVAILABLE = False
+try:
+    import orjson # Faster JSON decoding for the API payload
+except ImportError:
+    orjson = None
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 import re
+import os
+import html
+import json
+import atexit
+import heapq
 from datetime import datetime, timezone, timedelta
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Optional
 import sys # To check for library import
 
 # --- Attempt to import attackcti ---
@@ -26,6 +45,13 @@ except Exception as e:
     ATTACKCTI_AVAILABLE = False # Treat as unavailable if init fails
     attack_client = None
 
+# --- Optional fast keyword matcher (falls back to a compiled regex) ---
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 
 # --- Configuration ---
 
@@ -33,6 +59,15 @@ except Exception as e:
 RSS_FEED_URL = "https://www.ransomfeed.it/rss-complete.php"
 RANSOMWARE_LIVE_API_URL = "https://api.ransomware.live/posts" # Example endpoint - Verify!
 
+# Shared HTTP session so all sources reuse pooled TCP/TLS connections
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.headers.update({'User-Agent': 'Mozilla/5.0 (compatible; SimpleThreatIntelScript/1.0)',
+                             'Accept-Encoding': 'gzip, deflate'})
+HTTP_RETRY = Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504]) # Ride out transient 5xx
+HTTP_SESSION.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=HTTP_RETRY))
+HTTP_TIMEOUT = (5, 30) # (connect, read) seconds
+FETCH_MAX_WORKERS = 4
+
 # --- Predefined Profiles for User Selection ---
 INDUSTRY_PROFILES = {
     "1": {"name": "Finance/Insurance", "keywords": ['finance', 'banking', 'insurance', 'investment']},
@@ -64,29 +99,82 @@ ACTOR_ANALYSIS_WEIGHTS = {
     'country_hit': 3 # Weighted higher for country match
 }
 TOP_N_ACTORS_TO_SHOW = 10
+MIN_DATETIME = datetime.min.replace(tzinfo=timezone.utc) # Sort key for entries without a date
 MAX_RECENT_HITS_TO_SHOW = 3
 
 # --- Helper Functions ---
 
-def clean_html(raw_html):
-    """Removes HTML tags."""
+_HTML_TAG_RE = re.compile('<.*?>')
+
+def strip_html_tags(raw_html):
+    """Removes HTML tags, leaving entities encoded."""
     if not raw_html: return ""
-    cleanr = re.compile('<.*?>'); cleantext = re.sub(cleanr, '', raw_html)
-    return cleantext.replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>').strip()
-
-def extract_matching_keywords(text, keyword_list):
-    """Finds which keywords from the provided list exist in the text."""
-    found = []
-    if not text or not keyword_list: return found
-    text_lower = text.lower()
-    for keyword in keyword_list:
-        if re.search(r'\b' + re.escape(keyword.lower()) + r'\b', text_lower):
-            if keyword not in found: found.append(keyword)
+    return _HTML_TAG_RE.sub('', raw_html)
+
+def clean_html(raw_html):
+    """Removes HTML tags and decodes entities."""
+    return html.unescape(strip_html_tags(raw_html)).strip()
+
+def build_keyword_matcher(keyword_list):
+    """
+    Builds a reusable matcher for a keyword list: a scan(text_lower) function yielding whole-word
+    keyword matches, backed by an Aho-Corasick automaton when pyahocorasick is installed,
+    otherwise by one alternation regex over the lowercased keywords. The backend is chosen
+    here once rather than on every call.
+    """
+    if not keyword_list: return None
+    keywords = sorted({kw.lower() for kw in keyword_list}, key=len, reverse=True)
+    if AHOCORASICK_AVAILABLE:
+        automaton = ahocorasick.Automaton()
+        for keyword in keywords: automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+
+        def scan(text_lower):
+            last_index = len(text_lower) - 1
+            for end, keyword in automaton.iter(text_lower):
+                start = end - len(keyword) + 1
+                # Emulate \b: neighbouring characters must not be word characters
+                if start > 0 and _is_word_char(text_lower[start - 1]): continue
+                if end < last_index and _is_word_char(text_lower[end + 1]): continue
+                yield keyword
+        return scan
+
+    # Zero-width lookahead tries every start position, so overlapping keywords are all found;
+    # at each start the alternation takes the longest keyword (list is longest first).
+    keyword_re = re.compile(r'\b(?=(' + '|'.join(map(re.escape, keywords)) + r')\b)') # Matched against lowercased text
+    # Shorter keywords that occur as whole words inside a longer one (e.g. 'asia' in 'asia pacific')
+    nested_keywords = {kw: [other for other in keywords
+                            if len(other) < len(kw) and re.search(r'\b' + re.escape(other) + r'\b', kw)]
+                       for kw in keywords}
+
+    def scan(text_lower):
+        for match in keyword_re.finditer(text_lower):
+            keyword = match.group(1)
+            yield keyword
+            yield from nested_keywords[keyword]
+    return scan
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+def iter_matching_keywords(text_lower, matcher):
+    """Yields keywords handled by the matcher found in already-lowercased text (whole-word matches only)."""
+    if not text_lower or matcher is None: return iter(())
+    return matcher(text_lower)
+
+def extract_matching_keywords(texts_lower, matcher):
+    """Finds which keywords exist in any of the already-lowercased texts (e.g. victim, description)."""
+    found = set()
+    for text_lower in texts_lower: found.update(iter_matching_keywords(text_lower, matcher))
     return found
 
+def contains_keyword(texts_lower, matcher):
+    """Checks whether any keyword matches, stopping at the first hit (short victim field first)."""
+    return any(next(iter_matching_keywords(text_lower, matcher), None) is not None for text_lower in texts_lower)
+
 def extract_threat_actor_rss(entry, description_html):
     """Extracts threat actor from Ransomfeed RSS."""
-    actor = entry.get('category');
+    actor = entry.get('category') or (entry.get('tags') or [{}])[0].get('term') # fastfeedparser only exposes tags
     if actor: return actor.strip()
     if description_html:
         match = re.search(r'group called\s*<b>\s*([^<]+)\s*</b>', description_html, re.IGNORECASE)
@@ -108,6 +196,12 @@ def parse_iso_datetime(date_string):
         return None
 
 
+def make_entry_id(raw_id, victim_name, pub_date_iso):
+    """Returns the source id, or a deterministic victim/date composite when the source has none."""
+    if raw_id: return raw_id
+    return f"{(victim_name or '').lower()}_{pub_date_iso}"
+
+
 def parse_rfc822_datetime(time_struct):
     """Converts feedparser time.struct_time to datetime."""
     if not time_struct: return None
@@ -119,36 +213,49 @@ def parse_rfc822_datetime(time_struct):
 
 # --- Data Fetching and Normalization ---
 
+@dataclass(slots=True)
+class Entry:
+    """One normalized victim post (slotted to keep per-entry memory small)."""
+    id: str
+    victim: str
+    threat_actor: str
+    link: str
+    published_date: Optional[datetime] # Timezone-aware datetime object
+    published_date_iso: Optional[str]
+    description_html: str # Raw description; cleaned during analysis only if it can match
+    victim_lower: str # Lowercased once for keyword matching
+    source: str
+
 def fetch_rss_feed(url):
     """Fetches and parses RSS feed, normalizes entries."""
     print(f"Fetching RSS feed from: {url}")
     normalized_entries = []
     try:
-        headers = {'User-Agent': 'Mozilla/5.0 (compatible; SimpleThreatIntelScript/1.0)'} # Version bump
-        feed = feedparser.parse(url, agent=headers.get('User-Agent'))
-        if feed.bozo: print(f"Warning: RSS feed malformed. Reason: {feed.bozo_exception}")
-        if hasattr(feed, 'status') and feed.status != 200: print(f"Error: RSS HTTP {feed.status}."); return []
-        elif not feed.entries and not feed.feed: print("Error: No RSS data."); return []
-        for entry in feed.entries:
+        # Download via the shared session; feedparser only parses the bytes
+        response = HTTP_SESSION.get(url, timeout=HTTP_TIMEOUT)
+        if response.status_code != 200: print(f"Error: RSS HTTP {response.status_code}."); return []
+        feed = feedparser.parse(response.content)
+        if feed.get('bozo'): print(f"Warning: RSS feed malformed. Reason: {feed.get('bozo_exception')}")
+        if not feed.get('entries') and not feed.get('feed'): print("Error: No RSS data."); return []
+        for entry in feed['entries']:
             description_html = entry.get('description', entry.get('summary', ''))
             actor = extract_threat_actor_rss(entry, description_html)
-            pub_date = parse_rfc822_datetime(entry.get('published_parsed'))
+            if FASTFEEDPARSER_AVAILABLE: pub_date = parse_iso_datetime(entry.get('published')) # Already ISO 8601
+            else: pub_date = parse_rfc822_datetime(entry.get('published_parsed'))
             victim_name = entry.get('title', 'No Title')
-            description_clean = clean_html(description_html)
-            search_context = f"{victim_name} {description_clean}"
             pub_date_iso = pub_date.isoformat() if pub_date else None
 
-            normalized = {
-                'id': entry.get('guid', entry.get('link', entry.get('title'))),
-                'victim': victim_name,
-                'threat_actor': actor,
-                'link': entry.get('link', ''),
-                'published_date': pub_date, # Keep datetime object
-                'published_date_iso': pub_date_iso,
-                'description': description_clean,
-                'search_context': search_context,
-                'source': 'Ransomfeed.it RSS'
-            }
+            normalized = Entry(
+                id=make_entry_id(entry.get('guid', entry.get('id', entry.get('link', entry.get('title')))), victim_name, pub_date_iso),
+                victim=victim_name,
+                threat_actor=actor,
+                link=entry.get('link', ''),
+                published_date=pub_date,
+                published_date_iso=pub_date_iso,
+                description_html=description_html or '',
+                victim_lower=(victim_name or '').lower(),
+                source='Ransomfeed.it RSS'
+            )
             normalized_entries.append(normalized)
     except Exception as e: print(f"Error fetching/parsing RSS: {e}")
     return normalized_entries
@@ -158,10 +265,9 @@ def fetch_ransomware_live_api(url):
     print(f"Fetching API data from: {url}")
     normalized_entries = []
     try:
-        headers = {'User-Agent': 'Mozilla/5.0 (compatible; SimpleThreatIntelScript/1.0)'}
-        response = requests.get(url, headers=headers, timeout=30)
+        response = HTTP_SESSION.get(url, timeout=HTTP_TIMEOUT)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content) if orjson else json.loads(response.content) # Decode bytes directly
         if isinstance(data, list):
              for item in data:
                  victim_name = item.get('post_title', item.get('victim', 'No Title'))
@@ -169,23 +275,21 @@ def fetch_ransomware_live_api(url):
                  pub_date_str = item.get('discovered', item.get('published', item.get('created_at')))
                  description = item.get('description', '')
                  link = item.get('post_url', item.get('url', item.get('link', ''))) # Verify this!
-                 entry_id = item.get('id', f"{victim_name}_{pub_date_str}")
                  pub_date = parse_iso_datetime(pub_date_str) # Returns timezone-aware datetime
-                 description_clean = clean_html(description)
-                 search_context = f"{victim_name} {description_clean}"
                  pub_date_iso = pub_date.isoformat() if pub_date else None
-
-                 normalized = {
-                     'id': entry_id,
-                     'victim': victim_name,
-                     'threat_actor': threat_actor,
-                     'link': link,
-                     'published_date': pub_date, # Keep datetime object
-                     'published_date_iso': pub_date_iso,
-                     'description': description_clean,
-                     'search_context': search_context,
-                     'source': 'Ransomware.live API'
-                 }
+                 entry_id = make_entry_id(item.get('id'), victim_name, pub_date_iso)
+
+                 normalized = Entry(
+                     id=entry_id,
+                     victim=victim_name,
+                     threat_actor=threat_actor,
+                     link=link,
+                     published_date=pub_date,
+                     published_date_iso=pub_date_iso,
+                     description_html=description or '',
+                     victim_lower=(victim_name or '').lower(),
+                     source='Ransomware.live API'
+                 )
                  normalized_entries.append(normalized)
         else: print(f"Warning: Unexpected API response format: {type(data)}.")
     except requests.exceptions.RequestException as e: print(f"Error fetching API data: {e}")
@@ -194,12 +298,88 @@ def fetch_ransomware_live_api(url):
 
 
 # --- TTP Fetching ---
-# Cache for fetched TTPs to avoid repeated lookups
-ttp_cache = {}
+# Cache for fetched TTPs to avoid repeated lookups (persisted across runs)
+TTP_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.ttp_cache.json')
+TTP_CACHE_MAX_AGE = timedelta(days=7)
+
+def load_ttp_cache():
+    """Loads persisted actor TTP lookups, ignoring the file if it is older than TTP_CACHE_MAX_AGE."""
+    try:
+        with open(TTP_CACHE_FILE, 'r', encoding='utf-8') as f: cached = json.load(f)
+        if time.time() - cached['_fetched_at'] < TTP_CACHE_MAX_AGE.total_seconds():
+            return cached['_fetched_at'], cached['data']
+    except (OSError, ValueError, KeyError, TypeError): pass # Missing, corrupt or old-format cache
+    return time.time(), {}
+
+def save_ttp_cache():
+    """Writes actor TTP lookups to disk (registered with atexit)."""
+    if not ttp_cache: return
+    try:
+        with open(TTP_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'_fetched_at': ttp_cache_fetched_at, 'data': ttp_cache}, f)
+    except OSError as e: print(f"Warning: Could not write TTP cache file: {e}")
+
+ttp_cache_fetched_at, ttp_cache = load_ttp_cache()
+atexit.register(save_ttp_cache)
+
+# Group -> technique index built from one bulk ATT&CK download (persisted to disk)
+ATTACK_INDEX_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.attack_group_ttps.json')
+ATTACK_INDEX_MAX_AGE = timedelta(days=7) # ATT&CK content changes slowly
+GROUP_ALIAS_INDEX = {} # lowercase group name/alias -> group STIX id
+GROUP_TTPS = {} # group STIX id -> {technique_id: technique_name}
+attack_index_loaded = False
+
+def build_attack_index():
+    """Downloads groups, techniques and relationships once and builds the lookup indexes."""
+    print("Downloading MITRE ATT&CK CTI data (groups, techniques, relationships)...")
+    techniques = {}
+    for tech in attack_client.get_techniques():
+        if tech.get('x_mitre_is_subtechnique'): continue # Match include_subtechniques=False
+        tech_id = (tech.get('external_references') or [{}])[0].get('external_id', 'N/A')
+        if tech_id != 'N/A':
+            techniques[tech['id']] = (tech_id, tech.get('name', 'Unknown Technique Name'))
+
+    alias_index = {}
+    for group in attack_client.get_groups():
+        for alias in [group.get('name'), *(group.get('aliases') or [])]:
+            if alias: alias_index.setdefault(alias.lower(), group['id'])
+
+    group_ttps = defaultdict(dict)
+    for rel in attack_client.get_relationships():
+        if rel.get('relationship_type') != 'uses': continue
+        source_ref = rel.get('source_ref', '')
+        tech = techniques.get(rel.get('target_ref'))
+        if tech and source_ref.startswith('intrusion-set--'):
+            group_ttps[source_ref][tech[0]] = tech[1]
+    return alias_index, dict(group_ttps)
+
+def load_attack_index():
+    """Loads the group/TTP index from the on-disk cache, rebuilding it when missing or stale."""
+    global GROUP_ALIAS_INDEX, GROUP_TTPS, attack_index_loaded
+    if attack_index_loaded: return
+    attack_index_loaded = True # Only attempt once per run, even on failure
+    try:
+        cache_age = time.time() - os.path.getmtime(ATTACK_INDEX_CACHE_FILE)
+        if cache_age < ATTACK_INDEX_MAX_AGE.total_seconds():
+            with open(ATTACK_INDEX_CACHE_FILE, 'r', encoding='utf-8') as f: cached = json.load(f)
+            GROUP_ALIAS_INDEX, GROUP_TTPS = cached['aliases'], cached['group_ttps']
+            print(f"Loaded MITRE ATT&CK index from cache ({len(GROUP_TTPS)} groups with TTPs).")
+            return
+    except (OSError, ValueError, KeyError): pass # Missing or corrupt cache - rebuild below
+
+    try:
+        GROUP_ALIAS_INDEX, GROUP_TTPS = build_attack_index()
+        print(f"Indexed TTPs for {len(GROUP_TTPS)} MITRE ATT&CK groups.")
+    except Exception as e:
+        print(f"Error building MITRE ATT&CK index: {e}")
+        return
+    try:
+        with open(ATTACK_INDEX_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'aliases': GROUP_ALIAS_INDEX, 'group_ttps': GROUP_TTPS}, f)
+    except OSError as e: print(f"Warning: Could not write ATT&CK cache file: {e}")
 
 def get_actor_ttps(actor_name):
-    """Fetches TTPs for a given actor name using attackcti."""
-    global attack_client # Ensure we use the globally initialized client
+    """Looks up TTPs for a given actor name in the bulk ATT&CK index."""
     if not ATTACKCTI_AVAILABLE or not actor_name or actor_name == "Unknown" or attack_client is None:
         return {} # Return empty if library unavailable or actor unknown or client failed init
 
@@ -208,89 +388,93 @@ def get_actor_ttps(actor_name):
     if actor_name_lower in ttp_cache:
         return ttp_cache[actor_name_lower]
 
-    print(f"Fetching TTPs for {actor_name} from MITRE ATT&CK CTI...")
-    try:
-        # Use get_techniques_used_by_group - requires exact name or alias match
-        techniques = attack_client.get_techniques_used_by_group(actor_name, include_subtechniques=False)
+    load_attack_index()
+    if not GROUP_ALIAS_INDEX: return {} # Index unavailable - don't cache a false "no match"
+    # Requires exact name or alias match, same as get_techniques_used_by_group
+    group_id = GROUP_ALIAS_INDEX.get(actor_name_lower)
+    if group_id is None:
+        print(f" - No direct match found for '{actor_name}' in MITRE ATT&CK CTI.")
+        ttp_dict = {}
+    else:
+        ttp_dict = GROUP_TTPS.get(group_id, {})
+        print(f" - Found {len(ttp_dict)} TTPs for {actor_name}.")
+    ttp_cache[actor_name_lower] = ttp_dict # Cache result
+    return ttp_dict
 
-        if not techniques:
-             print(f" - No direct match found for '{actor_name}'.")
-             ttp_cache[actor_name_lower] = {}
-             return {}
+# --- Actor Targeting Analysis ---
 
-        ttp_dict = {}
-        for tech in techniques:
-            tech_id = getattr(tech, 'external_references', [{}])[0].get('external_id', 'N/A')
-            tech_name = getattr(tech, 'name', 'Unknown Technique Name')
-            if tech_id != 'N/A':
-                 ttp_dict[tech_id] = tech_name
+# Entry fields read during analysis, stored column-wise (one list per field)
+ENTRY_COLUMNS = ('victim', 'threat_actor', 'link', 'published_date', 'victim_lower', 'description_html')
 
-        print(f" - Found {len(ttp_dict)} TTPs for {actor_name}.")
-        ttp_cache[actor_name_lower] = ttp_dict # Cache result
-        return ttp_dict
+def entries_to_columns(entries):
+    """Converts normalized Entry objects into a dict of parallel lists keyed by ENTRY_COLUMNS."""
+    return {key: [getattr(entry, key) for entry in entries] for key in ENTRY_COLUMNS}
 
-    except Exception as e:
-        print(f" - Error fetching TTPs for {actor_name}: {e}")
-        ttp_cache[actor_name_lower] = {} # Cache empty result on error
-        return {}
+def build_keyword_prefilter(keyword_list, prefix_length=4):
+    """Returns the distinct lowercase keyword prefixes used to rule out descriptions before cleaning."""
+    return tuple({kw.lower()[:prefix_length] for kw in keyword_list})
 
-# --- Actor Targeting Analysis ---
+def may_contain_keyword(text_lower, keyword_prefilter):
+    """Cheap keyword-prefix test on tag-stripped, lowercased text (None disables the filter)."""
+    if not text_lower: return False
+    return keyword_prefilter is None or any(prefix in text_lower for prefix in keyword_prefilter)
 
-def analyze_actor_targeting(entries, selected_industry_keywords, selected_country_keywords):
+def analyze_actor_targeting(columns, industry_matcher, country_matcher, keyword_prefilter=None):
     """
-    Analyzes entries to identify actors targeting the selected profile.
+    Analyzes entry columns (see entries_to_columns) to identify actors targeting the selected profile.
     Stores details of hits, counts per country, fetches TTPs, and calculates weighted score.
+    Expects the columns to be ordered newest entry first. Descriptions are HTML-cleaned only
+    when they pass keyword_prefilter (see build_keyword_prefilter); None cleans them all.
     """
-    print(f"\nAnalyzing {len(entries)} entries for actor targeting...")
-    # Structure now includes 'ttps' field
-    actor_stats = defaultdict(lambda: {
-        'total_hits': 0, 'industry_hits': 0, 'region_hits': 0, # region_hits counts country matches
+    all_actors = columns['threat_actor']
+    print(f"\nAnalyzing {len(all_actors)} entries for actor targeting...")
+    if not all_actors: return {}
+    victims, links, dates = columns['victim'], columns['link'], columns['published_date']
+    victims_lower, descriptions_html = columns['victim_lower'], columns['description_html']
+    known_rows = [i for i, actor in enumerate(all_actors) if actor and actor != "Unknown"]
+
+    # Scan each keyword set column-wise; victim and description are matched separately
+    actors = [all_actors[i] for i in known_rows]
+    unique_actors = list(dict.fromkeys(actors)) # First-seen (newest) order
+    # Strip tags once per description; decode entities only when the prefilter passes
+    descriptions_lower = []
+    for i in known_rows:
+        stripped = strip_html_tags(descriptions_html[i])
+        passes = may_contain_keyword(stripped.lower(), keyword_prefilter)
+        descriptions_lower.append(html.unescape(stripped).strip().lower() if passes else '')
+    fields = list(zip((victims_lower[i] or '' for i in known_rows), descriptions_lower))
+    industry_hit = [contains_keyword(texts, industry_matcher) for texts in fields] # Only presence matters
+    country_found = [extract_matching_keywords(texts, country_matcher) for texts in fields]
+
+    # Aggregate hit columns per actor
+    total_hits = Counter(actors)
+    industry_hits = Counter(actor for actor, hit in zip(actors, industry_hit) if hit)
+    region_hits = Counter(actor for actor, found in zip(actors, country_found) if found) # Counts country matches
+    # Weighted score for every actor in one pass over the hit counts
+    industry_weight, country_weight = ACTOR_ANALYSIS_WEIGHTS['industry_hit'], ACTOR_ANALYSIS_WEIGHTS['country_hit']
+    scores = [industry_hits[actor] * industry_weight + region_hits[actor] * country_weight for actor in unique_actors]
+
+    # One pre-built stats record per unique actor, so the hit loop below only does plain lookups.
+    # TTPs are only looked up for actors that actually hit the profile (the only ones displayed).
+    actor_stats = {actor: {
+        'total_hits': total_hits[actor], 'industry_hits': industry_hits[actor], 'region_hits': region_hits[actor],
         'country_profile_hits': [], 'country_hit_counts': Counter(),
-        'score': 0, 'ttps': {} # Add field for TTPs
-    })
-    if not entries: return {}
-
-    # Sort entries by date first
-    entries.sort(key=lambda x: x.get('published_date') or datetime.min.replace(tzinfo=timezone.utc), reverse=True)
-
-    processed_actors = set() # Keep track of actors for whom TTPs have been fetched
-
-    for entry in entries:
-        actor = entry.get('threat_actor')
-        if not actor or actor == "Unknown": continue
-
-        search_context = entry.get('search_context', '')
-        actor_stats[actor]['total_hits'] += 1
-
-        # Fetch TTPs once per actor
-        if actor not in processed_actors:
-            actor_stats[actor]['ttps'] = get_actor_ttps(actor)
-            processed_actors.add(actor)
-
-        # Check industry match
-        found_industry_kws = extract_matching_keywords(search_context, selected_industry_keywords)
-        if found_industry_kws:
-            actor_stats[actor]['industry_hits'] += 1
-
-        # Check country/sub-region match
-        found_country_kws = extract_matching_keywords(search_context, selected_country_keywords)
-        if found_country_kws:
-            actor_stats[actor]['region_hits'] += 1 # Increment total country hits count
-            hit_date = entry.get('published_date')
-            hit_victim = entry.get('victim', 'N/A')
-            hit_link = entry.get('link', '')
-            if hit_date and hit_link:
-                actor_stats[actor]['country_profile_hits'].append((hit_date, hit_victim, hit_link))
-            for country_kw in found_country_kws:
-                 actor_stats[actor]['country_hit_counts'][country_kw] += 1
-
-    # Calculate weighted score after processing all entries
-    for actor, stats in actor_stats.items():
-         stats['score'] = (stats['industry_hits'] * ACTOR_ANALYSIS_WEIGHTS['industry_hit'] +
-                           stats['region_hits'] * ACTOR_ANALYSIS_WEIGHTS['country_hit'])
+        'score': scores[i], 'ttps': get_actor_ttps(actor) if scores[i] > 0 else {}
+    } for i, actor in enumerate(unique_actors)}
+
+    # Country details only for the (usually few) entries that matched a country
+    for row, actor, found_country_kws in zip(known_rows, actors, country_found):
+        if not found_country_kws: continue
+        stats = actor_stats[actor]
+        hit_date, hit_link = dates[row], links[row]
+        recent_hits = stats['country_profile_hits']
+        # Rows are newest first, so the first MAX_RECENT_HITS_TO_SHOW kept are the most recent
+        if hit_date and hit_link and len(recent_hits) < MAX_RECENT_HITS_TO_SHOW:
+            recent_hits.append((hit_date, victims[row] or 'N/A', hit_link))
+        stats['country_hit_counts'].update(found_country_kws)
 
     print(f"Analysis complete for {len(actor_stats)} unique known actors.")
-    return dict(actor_stats)
+    return actor_stats
 
 def display_potential_actors(actor_stats, selected_industries_names, selected_countries_names):
     """Displays top actors based on weighted score, showing country hits and fetched TTPs."""
@@ -301,28 +485,17 @@ def display_potential_actors(actor_stats, selected_industries_names, selected_co
     print(f"({profile_desc})")
     print("(Based on victim matches, ranked by weighted relevance. TTPs from MITRE ATT&CK CTI)")
 
-    actor_scores = []
-    for actor, stats in actor_stats.items():
-        if stats['score'] > 0:
-            actor_scores.append({
-                'name': actor,
-                'score': stats['score'],
-                'industry_hits': stats['industry_hits'],
-                'region_hits': stats['region_hits'],
-                'total_hits': stats['total_hits'],
-                'country_profile_hits': stats['country_profile_hits'],
-                'country_hit_counts': stats['country_hit_counts'],
-                'ttps': stats['ttps'] # Include fetched TTPs
-            })
-
-    actor_scores.sort(key=lambda x: (x['score'], x['total_hits']), reverse=True)
-
-    if not actor_scores:
+    scored_actors = [(actor, stats) for actor, stats in actor_stats.items() if stats['score'] > 0]
+    if not scored_actors:
         print("\nNo actors found with hits specifically matching the selected profile.")
         return
 
-    for i, actor_info in enumerate(actor_scores[:TOP_N_ACTORS_TO_SHOW]):
-        print(f"\n{i+1}. {actor_info['name']}")
+    # Partial selection of the top N (O(n log N)); ties keep the same order as a full stable sort
+    top_actors = heapq.nlargest(TOP_N_ACTORS_TO_SHOW, scored_actors,
+                                key=lambda item: (item[1]['score'], item[1]['total_hits']))
+
+    for i, (actor_name, actor_info) in enumerate(top_actors):
+        print(f"\n{i+1}. {actor_name}")
         # Score is not displayed
         print(f"   Industry Hits (Matching Profile): {actor_info['industry_hits']}")
         print(f"   Country Hits (Matching Profile Total): {actor_info['region_hits']}")
@@ -404,39 +577,44 @@ def get_profile_selection(profile_options, profile_type, is_region=False):
 if __name__ == "__main__":
     print("Starting Threat Actor Prediction Script...")
 
-    # 1. Fetch data
-    rss_entries = fetch_rss_feed(RSS_FEED_URL)
-    api_entries = fetch_ransomware_live_api(RANSOMWARE_LIVE_API_URL) # Adapt API parsing if needed
+    # 1. Fetch data (sources fetched concurrently to overlap network latency)
+    fetched = {}
+    with ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(fetch_rss_feed, RSS_FEED_URL): 'rss',
+            executor.submit(fetch_ransomware_live_api, RANSOMWARE_LIVE_API_URL): 'api', # Adapt API parsing if needed
+        }
+        for future in as_completed(futures):
+            try: fetched[futures[future]] = future.result()
+            except Exception as e: print(f"Error in {futures[future]} fetch: {e}")
+    all_raw_entries = fetched.get('rss', []) + fetched.get('api', []) # Keep source order stable for dedup
 
     # 2. Combine and Deduplicate
-    combined_entries = {}
-    all_raw_entries = rss_entries + api_entries
     print(f"\nFetched {len(all_raw_entries)} raw entries total.")
     if not all_raw_entries: print("No data fetched. Exiting."); exit()
 
-    for entry in all_raw_entries:
-        entry_id = entry.get('id')
-        if not entry_id:
-             date_part = entry.get('published_date_iso', str(time.time()))
-             entry_id = f"{entry.get('victim', '').lower()}_{date_part}"
-        existing_entry = combined_entries.get(entry_id)
-        if not existing_entry or \
-           (entry.get('published_date') and existing_entry.get('published_date') and \
-            entry['published_date'] > existing_entry['published_date']):
-             combined_entries[entry_id] = entry
-        elif not existing_entry: combined_entries[entry_id] = entry
-    deduplicated_list = list(combined_entries.values())
+    # Newest first (stable, so RSS wins date ties), then keep the first entry seen per id
+    all_raw_entries.sort(key=lambda x: x.published_date or MIN_DATETIME, reverse=True)
+    combined_entries = {}
+    for entry in all_raw_entries: combined_entries.setdefault(entry.id, entry)
+    deduplicated_list = list(combined_entries.values()) # Still newest first
     print(f"Combined into {len(deduplicated_list)} unique entries.")
+    entry_columns = entries_to_columns(deduplicated_list)
 
     # 3. Get User Profile Selection
     selected_industry_keywords, selected_industries_names = get_profile_selection(INDUSTRY_PROFILES, "Industry")
     selected_country_keywords, selected_countries_names = get_profile_selection(REGION_PROFILES, "Region", is_region=True)
 
+    industry_matcher = build_keyword_matcher(selected_industry_keywords)
+    country_matcher = build_keyword_matcher(selected_country_keywords)
+    keyword_prefilter = build_keyword_prefilter(selected_industry_keywords + selected_country_keywords)
+
     # 4. Analyze Actor Targeting (includes TTP fetching)
     actor_analysis_results = analyze_actor_targeting(
-        deduplicated_list,
-        selected_industry_keywords,
-        selected_country_keywords
+        entry_columns,
+        industry_matcher,
+        country_matcher,
+        keyword_prefilter
     )
 
     # 5. Display Potential Actors (includes dynamic TTPs)